@@ -3,19 +3,26 @@
 WhatsApp Job Bot - Filter: ONLY (B.Tech ECE) OR (Any Graduate)
 Stores seen jobs in SQLite to only send new ones in daily sends.
 Deploy with: gunicorn main:app
-Requirements: flask, twilio, requests, beautifulsoup4, python-dotenv, gunicorn
+Requirements: flask, twilio, requests, beautifulsoup4, lxml, pyahocorasick, python-dotenv, gunicorn
 """
 
 import os
 import re
+import html as htmllib
+import codecs
 import time
 import threading
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from urllib.request import pathname2url
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, NamedTuple
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from flask import Flask, request
 from twilio.twiml.messaging_response import MessagingResponse
 
@@ -34,6 +41,8 @@ app = Flask(__name__)
 MAX_SHOW = 8
 SEND_TIME = os.getenv("DAILY_SEND_TIME", "09:00")  # server time HH:MM
 DB_PATH = os.getenv("JOB_DB_PATH", "jobs_seen.db")
+MAX_PAGE_BYTES = 2_000_000  # pages are truncated beyond this before parsing
+CACHE_TTL = int(os.getenv("JOBS_CACHE_TTL", "900"))  # seconds to reuse a scrape
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
@@ -50,6 +59,18 @@ if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TwilioClient:
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
+# Shared HTTP session so TCP/TLS connections are pooled (keep-alive) across
+# fetches and daily runs; pool is sized above the number of concurrent fetches
+SESSION = requests.Session()
+# only connection failures are retried: a read timeout already cost the full
+# timeout, and retrying it would multiply the wait for a stalled source.
+# Connect attempts get a short timeout so three of them stay well under 12s.
+CONNECT_TIMEOUT = 3
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                       max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3))
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 # Minimal list of reliable sources (you can add more)
 SOURCES = [
     # FreeJobAlert (very stable)
@@ -90,92 +111,298 @@ SOURCES = [
 ]
 
 # ---------- UTILS ----------
+class Job(NamedTuple):
+    title: str
+    link: str
+    reasons: Tuple[str, ...] = ()
+
+# One long-lived connection shared by the webhook and scheduler threads.
+# Autocommit mode (isolation_level=None); batches use explicit BEGIN/COMMIT.
+DB = sqlite3.connect("file:" + pathname2url(DB_PATH), uri=True,
+                     check_same_thread=False, isolation_level=None)
+DB_LOCK = threading.Lock()
+# reused for every statement (always under DB_LOCK); sqlite3 caches the
+# prepared statements per connection, so repeat queries skip re-parsing
+DB_CUR = DB.cursor()
+
 def db_init():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS seen_jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            link TEXT UNIQUE,
-            title TEXT,
-            date_added TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-def mark_seen(link: str, title: str):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    with DB_LOCK:
+        DB_CUR.execute("PRAGMA journal_mode=WAL")
+        DB_CUR.execute("PRAGMA synchronous=NORMAL")
+        DB_CUR.execute("PRAGMA temp_store=MEMORY")
+        DB_CUR.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        DB_CUR.execute("""
+            CREATE TABLE IF NOT EXISTS seen_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                link TEXT UNIQUE,
+                title TEXT,
+                date_added TEXT
+            )
+        """)
+        DB_CUR.execute("""
+            CREATE TABLE IF NOT EXISTS source_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_mod TEXT,
+                html TEXT
+            )
+        """)
+
+# run at import so tables and PRAGMAs are in place under gunicorn too
+db_init()
+
+def mark_seen_many(rows: List[Tuple[str, str]]):
+    """Insert (link, title) rows in a single transaction."""
+    if not rows:
+        return
+    now = datetime.utcnow().isoformat()
+    with DB_LOCK:
+        DB_CUR.execute("BEGIN")
+        try:
+            DB_CUR.executemany("INSERT OR IGNORE INTO seen_jobs (link, title, date_added) VALUES (?, ?, ?)",
+                           [(link, title, now) for link, title in rows])
+            DB_CUR.execute("COMMIT")
+        except sqlite3.Error as e:
+            DB_CUR.execute("ROLLBACK")
+            print("mark_seen_many failed:", e)
+
+def seen_links(links: List[str], chunk: int = 500) -> frozenset:
+    """Return the subset of links already in seen_jobs, querying in chunks."""
+    links = list(dict.fromkeys(links))
+    found = set()
+    with DB_LOCK:
+        for i in range(0, len(links), chunk):
+            part = links[i:i + chunk]
+            q = "SELECT link FROM seen_jobs WHERE link IN (%s)" % ",".join("?" * len(part))
+            found.update(row[0] for row in DB_CUR.execute(q, part))
+    return frozenset(found)
+
+def source_cache_get(url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
     try:
-        cur.execute("INSERT INTO seen_jobs (link, title, date_added) VALUES (?, ?, ?)",
-                    (link, title, datetime.utcnow().isoformat()))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        pass
-    conn.close()
-
-def is_seen(link: str) -> bool:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM seen_jobs WHERE link = ? LIMIT 1", (link,))
-    r = cur.fetchone()
-    conn.close()
-    return bool(r)
-
-def fetch(url: str, timeout: int = 12) -> Optional[str]:
+        with DB_LOCK:
+            return DB_CUR.execute("SELECT etag, last_mod, html FROM source_cache WHERE url = ?", (url,)).fetchone()
+    except sqlite3.Error as e:
+        print("source cache read failed", url, e)
+        return None
+
+def source_cache_put(url: str, etag: Optional[str], last_mod: Optional[str], html: str):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
-        r.raise_for_status()
-        return r.text
+        with DB_LOCK:
+            DB_CUR.execute("INSERT OR REPLACE INTO source_cache (url, etag, last_mod, html) VALUES (?, ?, ?, ?)",
+                       (url, etag, last_mod, html))
+    except sqlite3.Error as e:
+        print("source cache write failed", url, e)
+
+def _codec(name: Optional[str]) -> str:
+    """Declared charset if Python knows it (e.g. not 'utf8mb4'), else utf-8."""
+    if name:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+# listing pages are HTML; the Employment News / MyGov sources are RSS
+PAGE_TYPES = ("text/html", "application/xhtml+xml", "text/xml", "application/xml", "application/rss+xml")
+
+def fetch(url: str, timeout: int = 12) -> Tuple[Optional[str], bool]:
+    """Returns (html, not_modified); html is None on failure, and
+    not_modified is True when the server answered 304 to our validators."""
+    cached = source_cache_get(url)
+    headers = HEADERS
+    if cached:
+        # conditional GET: unchanged pages come back as an empty 304
+        headers = dict(HEADERS)
+        if cached[0]:
+            headers["If-None-Match"] = cached[0]
+        if cached[1]:
+            headers["If-Modified-Since"] = cached[1]
+    try:
+        with SESSION.get(url, headers=headers, timeout=(min(CONNECT_TIMEOUT, timeout), timeout),
+                         stream=True) as r:
+            if r.status_code == 304 and cached:
+                return cached[2], True
+            r.raise_for_status()
+            ctype = r.headers.get("Content-Type", "").lower()
+            if ctype and not ctype.startswith(PAGE_TYPES):
+                print("fetch skipped", url, "content-type", ctype)
+                return None, False
+            buf = bytearray()
+            for chunk in r.iter_content(65536):
+                buf += chunk
+                if len(buf) >= MAX_PAGE_BYTES:
+                    del buf[MAX_PAGE_BYTES:]
+                    break
+            # trust a declared charset; otherwise assume utf-8 (skips charset sniffing)
+            encoding = _codec(r.encoding if "charset=" in ctype else None)
+            html = buf.decode(encoding, errors="replace")
+            etag, last_mod = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if etag or last_mod:
+                source_cache_put(url, etag, last_mod, html)
+            return html, False
     except Exception as e:
         print("fetch failed", url, e)
-        return None
+        return None, False
+
+@lru_cache(maxsize=64)
+def _base(base_url: str) -> str:
+    return base_url.rstrip("/")
 
+# nav menus repeat the same hrefs on every page; bounded so it can't grow forever
+@lru_cache(maxsize=4096)
 def normalize_link(base_url: str, href: str) -> str:
     if href.startswith("http"):
         return href
     if href.startswith("/"):
-        return base_url.rstrip("/") + href
-    return base_url.rstrip("/") + "/" + href
-
-def extract_jobs_from_html(html: str, base_url: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "html.parser")
-    results = []
-    # anchors first
-    for a in soup.find_all("a", href=True):
-        text = a.get_text(" ", strip=True)
-        if not text or len(text) < 8:
-            continue
-        href = normalize_link(base_url, a["href"])
-        combined = (text + " " + href).lower()
-        if any(k in combined for k in ["vacancy", "notification", "job", "recruit", "apply", "walk-in", "scientist", "engineer", "trainee", "assistant"]):
-            results.append({"title": text.strip(), "link": href})
+        return _base(base_url) + href
+    return _base(base_url) + "/" + href
+
+def _kw_re(words: List[str]) -> "re.Pattern":
+    """Compile a keyword list into one alternation regex (plain substring match)."""
+    return re.compile("|".join(re.escape(w) for w in words))
+
+# keyword sets used by the extractor
+ANCHOR_KW_RE = _kw_re(["vacancy", "notification", "job", "recruit", "apply", "walk-in", "scientist", "engineer", "trainee", "assistant"])
+DEGREE_KW_RE = _kw_re(["b.tech", "btech", "b.e", "b.e.", "electronics", "ece", "graduate", "any degree", "any graduate", "bachelor"])
+ROW_KW_RE = _kw_re(["vacancy", "notification", "job", "recruit", "apply", "walk-in", "scientist", "engineer"])
+
+# only materialize the tags the extractor inspects (skips script/style/head etc.)
+JOB_TAGS = SoupStrainer(["a", "li", "tr"])
+
+def extract_jobs_from_html(html: str, base_url: str) -> List[Job]:
+    soup = BeautifulSoup(html, "lxml", parse_only=JOB_TAGS)
+    # deduped as we go, keyed on link; rows without an anchor fall back to
+    # base_url, so those are keyed on (link, title) to keep them distinct
+    anchors = {}
+    rows = {}
+    # single pass over anchors and list items / table rows; anchors are still
+    # reported ahead of (and win over) the li/tr fallback matches
+    for node in soup.select("a[href], li, tr"):
+        text = node.get_text(" ", strip=True)
+        if len(text) < 8:
             continue
-        if any(k in combined for k in ["b.tech", "btech", "b.e", "b.e.", "electronics", "ece", "graduate", "any degree", "any graduate", "bachelor"]):
-            results.append({"title": text.strip(), "link": href})
-    # fallback: list items / table rows
-    for li in soup.find_all(["li", "tr"]):
-        text = li.get_text(" ", strip=True)
-        if not text or len(text) < 20:
+        if node.name == "a":
+            href = normalize_link(base_url, node["href"])
+            combined = (text + " " + href).lower()
+            if ANCHOR_KW_RE.search(combined) or DEGREE_KW_RE.search(combined):
+                anchors.setdefault(href, Job(text, href))
+        elif len(text) >= 20 and ROW_KW_RE.search(text.lower()):
+            a = node.find("a", href=True)
+            if a:
+                link = normalize_link(base_url, a["href"])
+                rows.setdefault(link, Job(text, link))
+            else:
+                rows.setdefault((base_url, text), Job(text, base_url))
+    for key, r in rows.items():
+        anchors.setdefault(key, r)
+    return list(anchors.values())
+
+# text regions BS4 never reports (comments, script, style)
+_NOISE_RE = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>", re.I | re.S)
+# one tag-attribute character, skipping whole quoted values (which may hold ">")
+_ATTR = r"""(?:"[^"]*"|'[^']*'|[^'">])"""
+# href must be its own attribute (whitespace before it), not data-href etc.
+_ANCHOR_RE = re.compile(
+    r"""<a\s(?:%s*?\s)?href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))%s*>(.*?)</a\s*>""" % (_ATTR, _ATTR),
+    re.I | re.S)
+_TAG_RE = re.compile(r"<%s*>" % _ATTR)
+_ROW_START_RE = re.compile(r"<(?:li|tr)\b%s*>" % _ATTR, re.I)
+_ROW_END_RE = re.compile(r"<(?:/?(?:li|tr)|/(?:ul|ol|table))\b", re.I)
+
+def _markup_text(fragment: str) -> str:
+    # same result as BS4 get_text(" ", strip=True) on the fragment
+    pieces = (htmllib.unescape(p).strip() for p in _TAG_RE.split(fragment))
+    return " ".join(p for p in pieces if p)
+
+def _has_listing_rows(html: str) -> bool:
+    """True if some li/tr row matching the row keywords carries text beyond
+    its own anchors (dates, qualifications, "Get Details" links...), i.e. the
+    page lists jobs in rows that only the BS4 row pass picks up."""
+    for m in _ROW_START_RE.finditer(html):
+        end = _ROW_END_RE.search(html, m.end())
+        row = html[m.end():end.start() if end else len(html)]
+        if _markup_text(_ANCHOR_RE.sub(" ", row)) and ROW_KW_RE.search(_markup_text(row).lower()):
+            return True
+    return False
+
+def regex_extract(html: str, base_url: str) -> List[Job]:
+    """Anchor extraction for listing pages without building a DOM.
+    Pages with job rows in li/tr (see _has_listing_rows) go to
+    extract_jobs_from_html so those rows are not lost."""
+    html = _NOISE_RE.sub(" ", html)
+    if _has_listing_rows(html):
+        return extract_jobs_from_html(html, base_url)
+    results = {}
+    for m in _ANCHOR_RE.finditer(html):
+        text = _markup_text(m.group(4))
+        if len(text) < 8:
             continue
-        low = text.lower()
-        if any(k in low for k in ["vacancy", "notification", "job", "recruit", "apply", "walk-in", "scientist", "engineer"]):
-            a = li.find("a", href=True)
-            link = normalize_link(base_url, a["href"]) if a else base_url
-            results.append({"title": text.strip(), "link": link})
-    # dedupe
-    seen = set()
-    out = []
-    for r in results:
-        key = (r["title"].strip(), r["link"].strip())
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(r)
-    return out
+        raw = m.group(1) if m.group(1) is not None else m.group(2) if m.group(2) is not None else m.group(3)
+        href = normalize_link(base_url, htmllib.unescape(raw))
+        combined = (text + " " + href).lower()
+        if ANCHOR_KW_RE.search(combined) or DEGREE_KW_RE.search(combined):
+            results.setdefault(href, Job(text, href))
+    return list(results.values())
+
+# per-source extractor; the job-listing blogs try the regex path (which
+# defers to BS4 for row-based pages), official sites and RSS go through BS4
+EXTRACTORS = {
+    "FJA-ENGG": regex_extract,
+    "FJA-PSU": regex_extract,
+    "FJA-GRAD": regex_extract,
+    "FJA-BTECH": regex_extract,
+    "SJF-LATEST": regex_extract,
+    "SJF-BTECH": regex_extract,
+    "SJF-GRAD": regex_extract,
+    "N360-LATEST": regex_extract,
+    "N360-ENGG": regex_extract,
+}
 
 # ---------- FILTER (YOUR EXACT RULE) ----------
+# keyword buckets for eligible_for_you; the rules below combine them
+ELIGIBILITY_KW = {
+    "reject": ["10th", "12th", "iti", "diploma", "polytechnic", "matric"],
+    "any_grad": ["any graduate", "any degree", "graduate in any", "bachelor degree in any", "degree in any", "graduation in any"],
+    "grad": ["graduate", "bachelor degree", "bachelor's degree", "degree required", "bachelor in"],
+    "btech": ["b.tech", "btech", "b.e"],
+    "ece_branch": ["ece", "electronics", "electronics & communication", "electronics and communication"],
+    "any_branch": ["any branch", "all engineering", "all branches"],
+    "other_branch": ["mechanical", "civil", "chemical", "electrical"],
+    "ece": ["ece", "electronics", "electronic"],
+    "tech_role": ["engineer", "scientist", "scientific", "technical", "technical assistant"],
+    "degree": ["degree", "graduate", "bachelor"],
+}
+
+# keyword -> buckets it belongs to (e.g. "ece" is in both ece and ece_branch)
+_KW_BUCKETS = {
+    kw: frozenset(b for b, words in ELIGIBILITY_KW.items() if kw in words)
+    for words in ELIGIBILITY_KW.values() for kw in words
+}
+
+# pyahocorasick gives a true single-pass multi-pattern scan; fall back to
+# per-bucket regexes where its wheel is unavailable
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+if ahocorasick:
+    _KW_AUTOMATON = ahocorasick.Automaton()
+    for _kw in _KW_BUCKETS:
+        _KW_AUTOMATON.add_word(_kw, _kw)
+    _KW_AUTOMATON.make_automaton()
+
+    def keyword_buckets(t: str) -> set:
+        hits = set()
+        for _, kw in _KW_AUTOMATON.iter(t):
+            hits |= _KW_BUCKETS[kw]
+        return hits
+else:
+    _BUCKET_RES = {b: _kw_re(words) for b, words in ELIGIBILITY_KW.items()}
+
+    def keyword_buckets(t: str) -> set:
+        return {b for b, rx in _BUCKET_RES.items() if rx.search(t)}
+
 def eligible_for_you(text: str) -> Tuple[Optional[bool], List[str]]:
     """
     Returns (True/False/None, reasons)
@@ -186,34 +413,37 @@ def eligible_for_you(text: str) -> Tuple[Optional[bool], List[str]]:
     t = text.lower()
     reasons = []
 
+    # one scan finds every keyword bucket present; the rules are set lookups
+    hits = keyword_buckets(t)
+
     # Immediate reject qualifiers (10th/12th/ITI/diploma)
-    if any(word in t for word in ["10th", "12th", "iti", "diploma", "polytechnic", "12th pass", "matric"]):
+    if "reject" in hits:
         reasons.append("Requires 10th/12th/ITI/Diploma")
         return False, reasons
 
     # Accept ANY GRADUATE phrases (priority)
-    if any(kw in t for kw in ["any graduate", "any degree", "graduate in any", "bachelor degree in any", "degree in any", "graduation in any"]):
+    if "any_grad" in hits:
         reasons.append("Open to Any Graduate / Any Degree")
         return True, reasons
 
     # Accept explicit mentions of 'graduate' or 'bachelor' for degree roles
-    if any(kw in t for kw in ["graduate", "bachelor degree", "bachelor's degree", "degree required", "bachelor in"]):
+    if "grad" in hits:
         # but avoid technician roles that explicitly require diploma/iti earlier handled
         reasons.append("Requires Graduate / Bachelor's degree")
         return True, reasons
 
     # If text contains 'b.tech' or 'btech' -> must ensure ECE/electronics is present
-    if "b.tech" in t or "btech" in t or "b.e" in t:
+    if "btech" in hits:
         # if ECE/electronics present => accept
-        if any(k in t for k in ["ece", "electronics", "electronics & communication", "electronics and communication"]):
+        if "ece_branch" in hits:
             reasons.append("Specifically mentions ECE / Electronics")
             return True, reasons
         # if 'any branch' explicitly present -> user does NOT want b.tech any-branch
-        if any(k in t for k in ["any branch", "all engineering", "all branches"]):
+        if "any_branch" in hits:
             reasons.append("B.Tech any branch — excluded by preference")
             return False, reasons
         # if other branch explicitly present (mechanical/civil) -> reject
-        if any(k in t for k in ["mechanical", "civil", "chemical", "electrical"]):
+        if "other_branch" in hits:
             reasons.append("Mentions other branch (not ECE)")
             return False, reasons
         # If b.tech present without branch mention -> ambiguous; treat as unknown (user didn't want any-branch)
@@ -221,12 +451,12 @@ def eligible_for_you(text: str) -> Tuple[Optional[bool], List[str]]:
         return False, reasons
 
     # If ECE/electronics terms appear without degree mention -> accept (likely ECE role)
-    if any(k in t for k in ["ece", "electronics", "electronic"]):
+    if "ece" in hits:
         reasons.append("Mentions ECE / Electronics")
         return True, reasons
 
     # If role is technical (engineer/scientist) and mentions 'degree' or 'graduate'
-    if any(k in t for k in ["engineer", "scientist", "scientific", "technical", "technical assistant"]) and any(k in t for k in ["degree", "graduate", "bachelor"]):
+    if "tech_role" in hits and "degree" in hits:
         reasons.append("Technical post requiring degree/graduate")
         return True, reasons
 
@@ -235,94 +465,97 @@ def eligible_for_you(text: str) -> Tuple[Optional[bool], List[str]]:
     return None, reasons
 
 # ---------- AGGREGATION ----------
-def aggregate_jobs() -> List[Dict]:
-    all_jobs = []
-    for name, url in SOURCES:
-        html = fetch(url)
+_WS_RE = re.compile(r"\s+")
+
+# url -> items from the last parse, reused when the source answers 304
+_EXTRACT_CACHE: Dict[str, List[Job]] = {}
+
+def aggregate_jobs() -> List[Job]:
+    # deduped as we go, keyed on link (same rule as extract_jobs_from_html)
+    all_jobs = {}
+    # fetch all sources concurrently (network bound), then parse in source order
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as pool:
+        pages = list(pool.map(fetch, [url for _, url in SOURCES]))
+    for (name, url), (html, not_modified) in zip(SOURCES, pages):
         if not html:
             continue
-        items = extract_jobs_from_html(html, base_url=url)
+        items = _EXTRACT_CACHE.get(url) if not_modified else None
+        if items is None:
+            items = EXTRACTORS.get(name, extract_jobs_from_html)(html, base_url=url)
+            _EXTRACT_CACHE[url] = items
         for it in items[:25]:
-            title = f"[{name}] {it['title']}"
-            link = it['link']
-            all_jobs.append({"title": title, "link": link})
-    # dedupe by normalized title+link
-    seen = set()
-    out = []
-    for j in all_jobs:
-        key = (re.sub(r"\s+", " ", j["title"].lower()).strip(), j["link"])
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(j)
-    return out
+            title = f"[{name}] {it.title}"
+            link = it.link
+            key = link if link != url else (_WS_RE.sub(" ", title.lower()).strip(), link)
+            all_jobs.setdefault(key, Job(title, link))
+    return list(all_jobs.values())
+
+# in-process cache of the last scrape, shared by webhook and scheduler
+_CACHE = {"t": 0.0, "jobs": None}
+_CACHE_LOCK = threading.Lock()
+
+def cached_aggregate(ttl: int = CACHE_TTL) -> List[Job]:
+    # the lock is held while scraping so concurrent callers wait for one scrape
+    with _CACHE_LOCK:
+        if _CACHE["jobs"] is not None and time.monotonic() - _CACHE["t"] < ttl:
+            return _CACHE["jobs"]
+        jobs = aggregate_jobs()
+        _CACHE["jobs"] = jobs
+        _CACHE["t"] = time.monotonic()
+        return jobs
 
 # ---------- REPORT & NEW FILTERED ----------
-def build_reports(jobs: List[Dict]) -> Tuple[str, Dict]:
+def _report_section(lines: List[str], header: str, entries: List[Job], note: bool = True):
+    # only the MAX_SHOW rendered rows get their reasons joined
+    lines.append(header)
+    if not entries:
+        lines.append("None")
+        return
+    for e in entries[:MAX_SHOW]:
+        lines.append("- " + e.title)
+        lines.append("  " + e.link)
+        if note:
+            lines.append("  Note: " + "; ".join(e.reasons))
+
+def build_reports(jobs: List[Job]) -> Tuple[str, Dict]:
     applicable = []
     not_applicable = []
     unknown = []
     new_applicable = []
+    # links to mark seen; written in one transaction after classification
+    to_mark = []
+    pending = set()
+    seen = seen_links([j.link for j in jobs])
 
     for j in jobs:
-        combined = f"{j['title']} {j['link']}"
+        combined = f"{j.title} {j.link}"
         eligible, reasons = eligible_for_you(combined)
-        entry = {"title": j['title'], "link": j['link'], "reasons": reasons}
+        entry = j._replace(reasons=tuple(reasons))
+        is_new = j.link not in seen and j.link not in pending
+        if is_new:
+            pending.add(j.link)
+            to_mark.append((j.link, j.title))
         if eligible is True:
             applicable.append(entry)
             # if unseen, add to new_applicable
-            if not is_seen(j['link']):
+            if is_new:
                 new_applicable.append(entry)
-                mark_seen(j['link'], j['title'])
         elif eligible is False:
+            # unseen not-applicable/unknown links are marked too, to avoid repeats
             not_applicable.append(entry)
-            # mark seen to avoid repeat in future if needed
-            if not is_seen(j['link']):
-                mark_seen(j['link'], j['title'])
         else:
             unknown.append(entry)
-            if not is_seen(j['link']):
-                mark_seen(j['link'], j['title'])
+    mark_seen_many(to_mark)
 
     now = datetime.utcnow().strftime("%d %b %Y")
     lines = [f"📅 Daily Job Report — {now}", ""]
-    lines.append("✅ Applicable (B.Tech ECE OR Any Graduate):")
-    if applicable:
-        for e in applicable[:MAX_SHOW]:
-            lines.append(f"- {e['title']}")
-            lines.append(f"  {e['link']}")
-            lines.append(f"  Note: {('; ').join(e['reasons'])}")
-    else:
-        lines.append("None")
-
+    _report_section(lines, "✅ Applicable (B.Tech ECE OR Any Graduate):", applicable)
     lines.append("")
-    lines.append("❌ Not Applicable:")
-    if not_applicable:
-        for e in not_applicable[:MAX_SHOW]:
-            lines.append(f"- {e['title']}")
-            lines.append(f"  {e['link']}")
-            lines.append(f"  Note: {('; ').join(e['reasons'])}")
-    else:
-        lines.append("None")
-
+    _report_section(lines, "❌ Not Applicable:", not_applicable)
     lines.append("")
-    lines.append("⚠️ Unable to detect:")
-    if unknown:
-        for e in unknown[:MAX_SHOW]:
-            lines.append(f"- {e['title']}")
-            lines.append(f"  {e['link']}")
-            lines.append(f"  Note: {('; ').join(e['reasons'])}")
-    else:
-        lines.append("None")
-
+    _report_section(lines, "⚠️ Unable to detect:", unknown)
     lines.append("")
-    lines.append("New applicable jobs (not previously seen):")
-    if new_applicable:
-        for e in new_applicable[:MAX_SHOW]:
-            lines.append(f"- {e['title']}")
-            lines.append(f"  {e['link']}")
-    else:
-        lines.append("None")
+    _report_section(lines, "New applicable jobs (not previously seen):", new_applicable, note=False)
 
     lines.append("")
     lines.append("Reply 'jobs' anytime to get on-demand summary.")
@@ -330,7 +563,22 @@ def build_reports(jobs: List[Dict]) -> Tuple[str, Dict]:
     stats = {"total": len(jobs), "applicable": len(applicable), "not_applicable": len(not_applicable), "unknown": len(unknown), "new_applicable": len(new_applicable)}
     return report_text, stats
 
+# build_reports marks links seen, so a second build of the same scrape would
+# report nothing new; reuse the first result for the same jobs list instead
+_REPORT_CACHE = {"jobs": None, "result": None}
+_REPORT_LOCK = threading.Lock()
+
+def cached_reports(jobs: List[Job]) -> Tuple[str, Dict]:
+    with _REPORT_LOCK:
+        if _REPORT_CACHE["jobs"] is not jobs:
+            _REPORT_CACHE["result"] = build_reports(jobs)
+            _REPORT_CACHE["jobs"] = jobs
+        return _REPORT_CACHE["result"]
+
 # ---------- TWILIO OUTGOING ----------
+# outbound sends run here so webhook handlers never block on Twilio REST calls
+SEND_POOL = ThreadPoolExecutor(max_workers=4)
+
 def send_whatsapp(body: str, to: Optional[str] = None):
     if not twilio_client or not TWILIO_WHATSAPP_FROM:
         print("Twilio not configured, skipping send.")
@@ -348,8 +596,8 @@ def send_whatsapp(body: str, to: Optional[str] = None):
 # ---------- DAILY TASK ----------
 def daily_task():
     print("[daily] starting aggregation")
-    jobs = aggregate_jobs()
-    report, stats = build_reports(jobs)
+    jobs = cached_aggregate()
+    report, stats = cached_reports(jobs)
     print("[daily] stats:", stats)
     # Try sending via Twilio to recipient if configured
     sent = send_whatsapp(report) if twilio_client else False
@@ -359,66 +607,94 @@ def daily_task():
     return report, stats
 
 # ---------- FLASK ENDPOINT ----------
+def chunked(text: str, n: int = 1500) -> Iterator[str]:
+    """Lazily split text on line boundaries into chunks of at most n chars
+    (a single longer line is yielded on its own)."""
+    buf = []
+    size = 0
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        end = len(text) if end == -1 else end + 1
+        line = text[start:end]
+        start = end
+        if size + len(line) > n and buf:
+            yield "".join(buf)
+            buf = [line]
+            size = len(line)
+        else:
+            buf.append(line)
+            size += len(line)
+    if buf:
+        yield "".join(buf)
+
+def send_chunks(parts: Iterable[str], to: Optional[str]):
+    # sequential on purpose: parallel sends could arrive out of order
+    for p in parts:
+        send_whatsapp(p, to)
+
 @app.route("/bot", methods=["POST"])
 def bot_webhook():
     incoming = (request.form.get("Body") or "").strip().lower()
     resp = MessagingResponse()
     if any(k in incoming for k in ["jobs", "daily", "today"]):
-        jobs = aggregate_jobs()
-        report, stats = build_reports(jobs)
+        jobs = cached_aggregate()
+        report, stats = cached_reports(jobs)
         # Twilio size protections: send first chunk in webhook response
-        MAX_CHUNK = 1500
-        if len(report) <= MAX_CHUNK:
-            resp.message(report)
-        else:
-            # split by lines
-            parts = []
-            cur = []
-            cur_len = 0
-            for line in report.splitlines(True):
-                if cur_len + len(line) > MAX_CHUNK and cur:
-                    parts.append("".join(cur))
-                    cur = [line]
-                    cur_len = len(line)
-                else:
-                    cur.append(line)
-                    cur_len += len(line)
-            if cur:
-                parts.append("".join(cur))
-            # respond with first part
-            resp.message(parts[0])
-            # send remaining parts via Twilio REST to the sender (if available)
-            if twilio_client:
-                to = request.form.get("From")
-                for p in parts[1:]:
-                    try:
-                        twilio_client.messages.create(body=p, from_=TWILIO_WHATSAPP_FROM, to=to)
-                    except Exception as e:
-                        print("Failed to send extra chunk:", e)
+        parts = chunked(report, 1500)
+        resp.message(next(parts))
+        # send remaining parts via Twilio REST to the sender (if available),
+        # off the request thread so the webhook returns immediately
+        if twilio_client:
+            SEND_POOL.submit(send_chunks, parts, request.form.get("From"))
         return str(resp)
     else:
         resp.message("Send 'jobs' to get today's job summary for B.Tech ECE or Any Graduate.")
         return str(resp)
 
 # ---------- SCHEDULER THREAD ----------
+def seconds_until(hh: int, mm: int, now: Optional[datetime] = None) -> float:
+    """Seconds from now (UTC) until the next HH:MM."""
+    now = now or datetime.utcnow()
+    next_run = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+DAILY_RETRIES = 5         # attempts at the send time before giving up for the day
+DAILY_RETRY_DELAY = 60    # seconds between attempts
+
 def scheduler_loop():
+    try:
+        send_at = datetime.strptime(SEND_TIME, "%H:%M")
+    except ValueError:
+        print("Scheduler disabled: DAILY_SEND_TIME must be HH:MM, got", repr(SEND_TIME))
+        return
     last_sent_date = None
     while True:
         try:
-            now = datetime.utcnow()
-            now_hm = now.strftime("%H:%M")
-            if now_hm == SEND_TIME:
-                today = now.date()
-                if last_sent_date != today:
+            # sleep straight to the next send time instead of polling
+            time.sleep(seconds_until(send_at.hour, send_at.minute))
+            today = datetime.utcnow().date()
+            if last_sent_date == today:
+                continue
+            # a failed run is retried shortly, not skipped until tomorrow
+            for attempt in range(1, DAILY_RETRIES + 1):
+                try:
                     daily_task()
                     last_sent_date = today
-            time.sleep(30)
+                    break
+                except Exception as e:
+                    print(f"Scheduler error (attempt {attempt}/{DAILY_RETRIES}):", e)
+                    if attempt < DAILY_RETRIES:
+                        time.sleep(DAILY_RETRY_DELAY)
+            else:
+                print("Scheduler: giving up on today's report")
         except Exception as e:
             print("Scheduler error:", e)
             time.sleep(10)
 
 if __name__ == "__main__":
-    db_init()
     # start scheduler if twilio configured and recipient provided
     if twilio_client and TWILIO_WHATSAPP_FROM and RECIPIENT_WHATSAPP:
         t = threading.Thread(target=scheduler_loop, daemon=True)